@@ -15,7 +15,7 @@ import gym, gym_agario
 import numpy as np
 import cProfile
 
-null_action = (np.zeros(2), 0)
+null_action = np.zeros(3, dtype=np.float32)
 default_config = {
     'ticks_per_step':  4,
     'num_frames':      1,
@@ -4,6 +4,7 @@
 #include <pybind11/numpy.h>
 
 #include <tuple>
+#include <optional>
 #include <iostream>
 #include <environment/envs/GridEnvironment.hpp>
 #include <environment/envs/RamEnvironment.hpp>
@@ -25,57 +26,128 @@ std::vector<T> to_vector(Tuple&& tuple) {
   }, std::forward<Tuple>(tuple));
 }
 
-/* converts a python list of actions to the C++ action wrapper */
-std::vector<agario::env::Action> to_action_vector(const py::list &actions) {
-  std::vector<agario::env::Action> acts;
-  acts.reserve(actions.size());
+using action_array = py::array_t<float, py::array::c_style | py::array::forcecast>;
+
+/* converts a (num_agents, 3) array of (dx, dy, a) rows to the C++ action wrapper,
+ * raising ValueError unless there is one action for each of the `num_agents` agents
+ * and each action is in the action space (i.e. dx, dy are numbers and 0 <= a <= 2) */
+std::vector<agario::env::Action> to_action_vector(const action_array &actions, int num_agents) {
+  if (actions.ndim() != 2 || actions.shape(0) != num_agents || actions.shape(1) != 3)
+    throw py::value_error("actions must be an array of shape (" + std::to_string(num_agents) + ", 3)");
 
-  for (auto &action : actions) {
-    auto t = py::cast<py::tuple>(action);
+  auto a = actions.unchecked<2>();
 
-    auto dx = py::cast<float>(t[0]);
-    auto dy = py::cast<float>(t[1]);
-    auto a = static_cast<agario::action>(py::cast<int>(t[2]));
+  std::vector<agario::env::Action> acts;
+  acts.reserve(a.shape(0));
+  for (ssize_t i = 0; i < a.shape(0); i++) {
+    float dx = a(i, 0), dy = a(i, 1), game_action = a(i, 2);
 
-    acts.emplace_back(dx, dy, a);
+    // written such that NaNs are rejected too
+    if (dx != dx || dy != dy || !(0 <= game_action && game_action <= 2))
+      throw py::value_error("action (" + std::to_string(dx) + ", " + std::to_string(dy) + ", "
+                            + std::to_string(game_action) + ") not in action space");
+
+    acts.emplace_back(dx, dy, static_cast<agario::action>(static_cast<int>(game_action)));
   }
   return acts;
 }
 
-/* extracts observations from each agent, wrapping them in NumPy arrays */
+/* extracts observations from each agent, wrapping them in read-only NumPy arrays which
+ * view the environment's own observation buffers rather than copies of them. The arrays
+ * share ownership of their buffer, so they stay valid even if the observation is
+ * re-configured, but since the environment re-uses its buffers they are overwritten
+ * by the next step, so copy them if they need to be kept */
 template <typename Environment>
 py::list get_state(const Environment &environment) {
   using dtype = typename Environment::dtype;
+  using Buffer = typename Environment::Observation::Buffer;
 
   auto &observations = environment.get_observations();
   py::list obs;
   for (auto &observation : observations) {
-    // make a copy of the data for the numpy array to take ownership of
-    auto *data = new dtype[observation.length()];
-    std::copy(observation.data(), observation.data() + observation.length(), data);
-
     const auto &shape = observation.shape();
     const auto &strides = observation.strides();
 
-    py::capsule cleanup(data, [](void *ptr) {
-      auto *data_pointer = reinterpret_cast<dtype*>(ptr);
-      delete[] data_pointer;
-    });
+    // the capsule (as the base object) makes NumPy borrow the data rather than copy it
+    auto *buffer = new Buffer(observation.buffer());
+    py::capsule base(buffer, [](void *b) { delete static_cast<Buffer *>(b); });
 
-    // add the numpy array to the list of observations
-    obs.append(py::array_t<dtype>(to_vector(shape), to_vector(strides), data, cleanup));
+    py::array_t<dtype> array(to_vector(shape), to_vector(strides), buffer->get(), base);
+    array.attr("setflags")(py::arg("write") = false);
+    obs.append(array);
   }
   return obs; // list of numpy arrays
 }
 
-PYBIND11_MODULE(agarle, module) {
-  using namespace py::literals;
-  module.doc() = "Agar.io Learning Environment";
+/* raises ValueError unless `out` can hold the observation of every agent */
+template <typename Environment>
+void check_state_buffer(const Environment &environment,
+                        const py::array_t<typename Environment::dtype, py::array::c_style> &out) {
+  auto &observations = environment.get_observations();
 
-  /* ================ Grid Environment ================ */
-  using GridEnvironment = agario::env::GridEnvironment<int, renderable>;
+  if (out.ndim() == 0 || out.shape(0) != static_cast<ssize_t>(observations.size()))
+    throw py::value_error("Output buffer's first dimension must equal the number of agents ("
+                          + std::to_string(observations.size()) + ")");
+
+  for (auto &observation : observations)
+    if (static_cast<ssize_t>(observation.length() * observations.size()) != out.size())
+      throw py::value_error("Output buffer size does not match observation size");
+}
+
+/* copies the observation of each agent, one after another, into `data`.
+ * Doesn't touch any Python objects, so may be called without the GIL */
+template <typename Environment>
+void copy_state(const Environment &environment, typename Environment::dtype *data) {
+  for (auto &observation : environment.get_observations())
+    data = std::copy(observation.data(), observation.data() + observation.length(), data);
+}
+
+/* copies the observation of each agent into `out`, a caller-owned NumPy array
+ * whose first dimension indexes the agent. Re-using `out` between steps avoids
+ * allocating (and zero-filling) a new array for every observation. */
+template <typename Environment>
+void get_state_into(const Environment &environment,
+                    py::array_t<typename Environment::dtype, py::array::c_style> out) {
+  check_state_buffer(environment, out);
+  copy_state(environment, out.mutable_data());
+}
 
-  py::class_<GridEnvironment>(module, "GridEnvironment")
+/* validates and takes the actions and steps the environment in a single call from Python. If `out`
+ * is given, the resulting observations are also copied into it (see get_state_into),
+ * otherwise they may be read through the arrays returned by get_state. The GIL is released
+ * while the game is stepped, so that environments may be stepped in parallel threads
+ * @return tuple of the rewards and the "done" status of each agent */
+template <typename Environment>
+py::tuple step_full(Environment &environment, const action_array &actions,
+                    std::optional<py::array_t<typename Environment::dtype, py::array::c_style>> out) {
+  using dtype = typename Environment::dtype;
+
+  auto action_vector = to_action_vector(actions, environment.num_agents());
+
+  dtype *data = nullptr;
+  if (out) {
+    check_state_buffer(environment, *out);
+    data = out->mutable_data();
+  }
+
+  std::vector<agario::env::reward> rewards;
+  {
+    py::gil_scoped_release release;
+    environment.take_actions(action_vector);
+    rewards = environment.step();
+    if (data != nullptr)
+      copy_state(environment, data);
+  }
+  return py::make_tuple(rewards, environment.dones());
+}
+
+/* binds the GridEnvironment whose observations have data type `T` as `name` */
+template <typename T>
+void bind_grid_environment(py::module &module, const char *name) {
+  using namespace py::literals;
+  using GridEnvironment = agario::env::GridEnvironment<T, renderable>;
+
+  py::class_<GridEnvironment>(module, name)
     .def(py::init<int, int, int, bool, int, int, int>())
     .def("seed", &GridEnvironment::seed)
     .def("configure_observation", [](GridEnvironment &env, const py::dict &config) {
@@ -86,18 +158,37 @@ PYBIND11_MODULE(agarle, module) {
       bool others    = config.contains("observe_others")  ? config["observe_others"].cast<bool>()  : true;
       bool viruses   = config.contains("observe_viruses") ? config["observe_viruses"].cast<bool>() : true;
       bool pellets   = config.contains("observe_pellets") ? config["observe_pellets"].cast<bool>() : true;
+      auto layout    = config.contains("layout")          ? config["layout"].cast<std::string>()   : "NCHW";
+
+      if (layout != "NCHW" && layout != "NHWC")
+        throw py::value_error("layout must be one of \"NCHW\" or \"NHWC\", got: " + layout);
+      bool channels_last = layout == "NHWC";
 
-      env.configure_observation(num_frames, grid_size, cells, others, viruses, pellets);
+      env.configure_observation(num_frames, grid_size, cells, others, viruses, pellets, channels_last);
     })
     .def("observation_shape", &GridEnvironment::observation_shape)
     .def("dones", &GridEnvironment::dones)
-    .def("take_actions", [](GridEnvironment &env, const py::list &actions) {
-      env.take_actions(to_action_vector(actions));
+    .def("take_actions", [](GridEnvironment &env, const action_array &actions) {
+      env.take_actions(to_action_vector(actions, env.num_agents()));
     })
     .def("reset", &GridEnvironment::reset)
     .def("render", &GridEnvironment::render)
     .def("step", &GridEnvironment::step)
-    .def("get_state", &get_state<GridEnvironment>);
+    .def("get_state", &get_state<GridEnvironment>)
+    .def("get_state_into", &get_state_into<GridEnvironment>, "out"_a.noconvert())
+    .def("step_full", &step_full<GridEnvironment>, "actions"_a, "out"_a.noconvert() = py::none());
+}
+
+PYBIND11_MODULE(agarle, module) {
+  using namespace py::literals;
+  module.doc() = "Agar.io Learning Environment";
+
+  /* ================ Grid Environment ================ */
+  /* int16 grids are plenty for cell masses (they saturate rather than
+   * overflow) and halve the bandwidth of int32 grids */
+  bind_grid_environment<int16_t>(module, "GridEnvironment");
+  bind_grid_environment<int32_t>(module, "GridEnvironmentInt32");
+  bind_grid_environment<uint8_t>(module, "GridEnvironmentUInt8");
 
   
   /* ================ Ram Environment ================ */
@@ -108,13 +199,15 @@ PYBIND11_MODULE(agarle, module) {
     .def("seed", &RamEnvironment::seed)
     .def("observation_shape", &RamEnvironment::observation_shape)
     .def("dones", &RamEnvironment::dones)
-    .def("take_actions", [](RamEnvironment &env, const py::list &actions) {
-      env.take_actions(to_action_vector(actions));
+    .def("take_actions", [](RamEnvironment &env, const action_array &actions) {
+      env.take_actions(to_action_vector(actions, env.num_agents()));
     })
     .def("reset", &RamEnvironment::reset)
     .def("render", &RamEnvironment::render)
     .def("step", &RamEnvironment::step)
-    .def("get_state", &get_state<RamEnvironment>);
+    .def("get_state", &get_state<RamEnvironment>)
+    .def("get_state_into", &get_state_into<RamEnvironment>, "out"_a.noconvert())
+    .def("step_full", &step_full<RamEnvironment>, "actions"_a, "out"_a.noconvert() = py::none());
 
   
   /* ================ Screen Environment ================ */
@@ -131,8 +224,8 @@ PYBIND11_MODULE(agarle, module) {
 //    .def("seed", &ScreenEnvironment::seed)
 //    .def("observation_shape", &ScreenEnvironment::observation_shape)
 //    .def("dones", &ScreenEnvironment::dones)
-//    .def("take_actions", [](ScreenEnvironment &env, const py::list &actions) {
-//      env.take_actions(to_action_vector(actions));
+//    .def("take_actions", [](ScreenEnvironment &env, const action_array &actions) {
+//      env.take_actions(to_action_vector(actions, env.num_agents()));
 //    })
 //    .def("reset", &ScreenEnvironment::reset)
 //    .def("render", &ScreenEnvironment::render)
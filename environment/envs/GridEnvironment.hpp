@@ -1,6 +1,9 @@
 #pragma once
 
 #include <cassert>
+#include <limits>
+#include <memory>
+#include <type_traits>
 
 #include <agario/engine/Engine.hpp>
 #include <agario/core/types.hpp>
@@ -34,6 +37,7 @@ namespace agario::env {
       using dtype = T;
       using Shape = std::tuple<int, int, int>;
       using Strides = std::tuple<ssize_t, ssize_t, ssize_t>;
+      using Buffer = std::shared_ptr<dtype[]>;
 
       /* construct without configuring. configure() must be called. */
       GridObservation() : data_(nullptr) { }
@@ -42,7 +46,7 @@ namespace agario::env {
       template <typename ...Args>
       explicit GridObservation(Args&&... args) : config_(args...) {
         _make_shapes();
-        data_ = new dtype[length()];
+        data_ = Buffer(new dtype[length()]);
         clear_data();
       }
 
@@ -51,10 +55,9 @@ namespace agario::env {
       void configure(Args&&... args) {
         config_(args...);
 
-        delete[] data_; // might be nullptr, thats ok
-
+        // the old buffer is only freed once nothing else shares it (see buffer())
         _make_shapes();
-        data_ = new dtype[length()];
+        data_ = Buffer(new dtype[length()]);
         clear_data();
       }
 
@@ -62,6 +65,14 @@ namespace agario::env {
 
       /* data buffer, mulit-dim array shape and sizes*/
       const dtype *data() const {
+        if (!configured())
+          throw EnvironmentException("GridObservation was not configured.");
+        return data_.get();
+      }
+
+      /* shared ownership of the data buffer, for anything viewing it (i.e. NumPy
+       * arrays) which may outlive the observation or its re-configuration */
+      [[nodiscard]] const Buffer &buffer() const {
         if (!configured())
           throw EnvironmentException("GridObservation was not configured.");
         return data_;
@@ -85,7 +96,7 @@ namespace agario::env {
           throw EnvironmentException("GridObservation was not configured.");
 
         int channel = channels_per_frame() * frame_index;
-        _mark_out_of_bounds(player, channel, game_state.arena_width, game_state.arena_height);
+        (this->*mark_out_of_bounds_)(player, channel, game_state.arena_width, game_state.arena_height);
 
         if (config_.observe_pellets) {
           channel++;
@@ -112,7 +123,7 @@ namespace agario::env {
       }
 
       void clear_data() {
-        std::fill(data_, data_ + length(), 0);
+        std::fill(data_.get(), data_.get() + length(), 0);
       }
 
       /* full length of data array */
@@ -133,9 +144,8 @@ namespace agario::env {
         data_(std::move(obs.data_)),
         shape_(std::move(obs.shape_)),
         strides_(std::move(obs.strides_)),
-        config_(std::move(obs.config_)) {
-        obs.data_ = nullptr;
-      };
+        config_(std::move(obs.config_)),
+        mark_out_of_bounds_(obs.mark_out_of_bounds_) { };
 
       /* move assignment */
       GridObservation &operator=(GridObservation &&obs) noexcept {
@@ -143,13 +153,12 @@ namespace agario::env {
         shape_ = std::move(obs.shape_);
         strides_ = std::move(obs.strides_);
         config_ = std::move(obs.config_);
-        obs.data_ = nullptr;
+        mark_out_of_bounds_ = obs.mark_out_of_bounds_;
         return *this;
       };
-      ~GridObservation() { delete[] data_; }
 
     private:
-      dtype *data_;
+      Buffer data_;
       Shape shape_;
       Strides strides_;
 
@@ -158,16 +167,19 @@ namespace agario::env {
       public:
         Configuration(int num_frames, int grid_size,
                       bool observe_cells, bool observe_others,
-                      bool observe_viruses, bool observe_pellets) :
+                      bool observe_viruses, bool observe_pellets,
+                      bool channels_last = false) :
           num_frames(num_frames), grid_size(grid_size),
           observe_cells(observe_cells), observe_others(observe_others),
-          observe_pellets(observe_pellets), observe_viruses(observe_viruses) {}
+          observe_pellets(observe_pellets), observe_viruses(observe_viruses),
+          channels_last(channels_last) {}
         int num_frames;
         int grid_size;
         bool observe_pellets;
         bool observe_cells;
         bool observe_viruses;
         bool observe_others;
+        bool channels_last; // NHWC (channels_last) or NCHW layout
       };
 
       Configuration config_;
@@ -179,17 +191,34 @@ namespace agario::env {
                                 + config_.observe_viruses + config_.observe_pellets);
       }
 
+      /* the total number of channels across all frames */
+      [[nodiscard]] int num_channels() const {
+        return config_.num_frames * channels_per_frame();
+      }
+
       /* creates the shape and strides to represent the multi-dimensional array */
       void _make_shapes() {
-        int num_channels = config_.num_frames * channels_per_frame();
-        shape_ = {num_channels, config_.grid_size, config_.grid_size};
+        mark_out_of_bounds_ = _mark_out_of_bounds_kernel(config_.grid_size);
 
+        int num_channels = this->num_channels();
         auto dtype_size = static_cast<long>(sizeof(dtype));
-        strides_ = {
-          config_.grid_size * config_.grid_size * dtype_size,
-          config_.grid_size * dtype_size,
-          dtype_size
-        };
+
+        if (config_.channels_last) {
+          // (height, width, channels) with channels varying fastest
+          shape_ = {config_.grid_size, config_.grid_size, num_channels};
+          strides_ = {
+            config_.grid_size * num_channels * dtype_size,
+            num_channels * dtype_size,
+            dtype_size
+          };
+        } else {
+          shape_ = {num_channels, config_.grid_size, config_.grid_size};
+          strides_ = {
+            config_.grid_size * config_.grid_size * dtype_size,
+            config_.grid_size * dtype_size,
+            dtype_size
+          };
+        }
       }
 
       /* stores the given entities in the data array at the given `channel` */
@@ -203,24 +232,64 @@ namespace agario::env {
 
           int index = _index(channel, grid_x, grid_y);
           if (_inside_grid(grid_x, grid_y))
-            data_[index] = entity.mass();
+            data_[index] = _saturate(entity.mass());
         }
       }
 
-      /* marks out-of-bounds locations on the given `channel` */
+      /* value marking out-of-bounds locations: -1, or the largest value of unsigned types */
+      static constexpr dtype out_of_bounds = std::is_signed<dtype>::value ?
+                                             static_cast<dtype>(-1) : std::numeric_limits<dtype>::max();
+
+      /* converts `mass` to dtype, saturating at the largest value of dtype
+       * so that narrow data types (i.e. int16) don't overflow */
+      static dtype _saturate(agario::mass mass) {
+        auto max = static_cast<agario::mass>(std::numeric_limits<dtype>::max());
+        return static_cast<dtype>(std::min<agario::mass>(mass, max));
+      }
+
+      /* pointer to a _mark_out_of_bounds kernel (specialized for some grid size) */
+      using MarkOutOfBounds = void (GridObservation::*)(const Player &, int, agario::distance, agario::distance);
+      MarkOutOfBounds mark_out_of_bounds_ = nullptr;
+
+      /* selects the _mark_out_of_bounds kernel specialized for `grid_size`, if there is one */
+      static MarkOutOfBounds _mark_out_of_bounds_kernel(int grid_size) {
+        switch (grid_size) {
+          case 128: return &GridObservation::_mark_out_of_bounds<128>;
+          case 64:  return &GridObservation::_mark_out_of_bounds<64>;
+          case 32:  return &GridObservation::_mark_out_of_bounds<32>;
+          default:  return &GridObservation::_mark_out_of_bounds<0>;
+        }
+      }
+
+      /* marks out-of-bounds locations on the given `channel`. If `GridSize` is non-zero
+       * it must equal the configured grid size, and makes the loop bounds and strides
+       * compile-time constants so that the compiler may unroll and vectorize the loops */
+      template <int GridSize>
       void _mark_out_of_bounds(const Player &player, int channel,
                                agario::distance arena_width, agario::distance arena_height) {
+        const int grid_size = GridSize > 0 ? GridSize : config_.grid_size;
         float view_size = _view_size(player);
+        float centering = grid_size / 2.0;
+
+        // grid-coordinates are converted to world-coordinates relative to the player's location,
+        // which is computed from all of its cells, so only do so once
+        const Location origin = player.location();
+
+        // consecutive grid_y are a whole pixel (all channels) apart in NHWC
+        const int y_stride = config_.channels_last ? num_channels() : 1;
+
+        for (int i = 0; i < grid_size; i++) {
+          float dx = (static_cast<float>(i) - centering) * view_size / grid_size;
+          dtype *row = data_.get() + _index<GridSize>(channel, i, 0);
 
-        int centering = config_.grid_size / 2;
-        for (int i = 0; i < config_.grid_size; i++)
-          for (int j = 0; j < config_.grid_size; j++) {
+          for (int j = 0; j < grid_size; j++) {
+            float dy = (static_cast<float>(j) - centering) * view_size / grid_size;
 
-            auto loc = _grid_to_world(player, view_size, i, j);
-            int index = _index(channel, i, j);
+            auto loc = origin + Location(dx, dy);
             bool in_bounds = _in_bounds(loc, arena_width, arena_height);
-            data_[index] = in_bounds ? 0 : -1;
+            row[j * y_stride] = in_bounds ? 0 : out_of_bounds;
           }
+        }
       }
 
       /* determines what the view size should be, based on the player's mass */
@@ -242,22 +311,17 @@ namespace agario::env {
         grid_y = static_cast<int>(config_.grid_size * diff_y / view_size + centering);
       }
 
-      /* converts grid-coordinates to world-coordinates */
-      Location _grid_to_world(const Player &player, float view_size, int grid_x, int grid_y) const {
-        float centering = config_.grid_size / 2.0;
-
-        float x_diff = static_cast<float>(grid_x) - centering;
-        float y_diff = static_cast<float>(grid_y) - centering;
+      /* the index of a given channel, x, y grid-coordinate in the `_data` array.
+       * `GridSize` is the grid size if known at compile time, else 0 */
+      template <int GridSize = 0>
+      [[nodiscard]] int _index(int channel, int grid_x, int grid_y) const {
+        const int grid_size = GridSize > 0 ? GridSize : config_.grid_size;
 
-        float dx = x_diff * view_size / config_.grid_size;
-        float dy = y_diff * view_size / config_.grid_size;
-        return player.location() + Location(dx, dy);
-      }
+        if (config_.channels_last)
+          return (grid_size * grid_x + grid_y) * num_channels() + channel;
 
-      /* the index of a given channel, x, y grid-coordinate in the `_data` array */
-      [[nodiscard]] int _index(int channel, int grid_x, int grid_y) const {
-        int channel_stride = config_.grid_size * config_.grid_size;
-        int x_stride = config_.grid_size;
+        int channel_stride = grid_size * grid_size;
+        int x_stride = grid_size;
         int y_stride = 1;
         return channel_stride * channel + x_stride * grid_x + y_stride * grid_y;
       }
@@ -10,6 +10,7 @@
 
 #include <environment/envs/BaseEnvironment.hpp>
 
+#include <memory>
 #include <tuple>
 
 #define DEFAULT_NUM_FOODS 10
@@ -38,6 +39,7 @@ namespace agario {
       using dtype = float;
       using Shape = std::tuple<int>;
       using Strides = std::tuple<ssize_t>;
+      using Buffer = std::shared_ptr<dtype[]>;
 
       /* Construct a ram observation from the perspective of `player` for the
        * given game state `game_state`.
@@ -46,11 +48,11 @@ namespace agario {
                               int num_pellets, int num_viruses):
                               num_pellets(num_pellets), num_viruses(num_viruses){
         _make_shapes(game_state);
-        _data = new dtype[length()];
+        _data = Buffer(new dtype[length()]);
       }
 
       void clear_data() {
-        std::fill(_data, _data + length(), 0);
+        std::fill(_data.get(), _data.get() + length(), 0);
       }
 
       /* captures the state of the game as a "RAM" observation */
@@ -75,7 +77,8 @@ namespace agario {
       }
 
       /* data buffer, mulit-dim array shape and sizes*/
-      [[nodiscard]] const dtype *data() const { return _data; }
+      [[nodiscard]] const dtype *data() const { return _data.get(); }
+      [[nodiscard]] const Buffer &buffer() const { return _data; } // shared with any views of the data
       [[nodiscard]] const Shape &shape() const { return _shape; }
       [[nodiscard]] const Shape & strides() const { return _strides; }
 
@@ -88,23 +91,18 @@ namespace agario {
       /* move constructor */
       RamObservation(RamObservation &&obs) noexcept : _data(std::move(obs._data)),
                                                       _shape(std::move(obs._shape)),
-                                                      _strides(std::move(obs._strides)) {
-        obs._data = nullptr;
-      };
+                                                      _strides(std::move(obs._strides)) { };
 
       /* move assignment */
       RamObservation &operator=(RamObservation &&obs) noexcept {
         _data = std::move(obs._data);
         _shape = std::move(obs._shape);
         _strides = std::move(obs._strides);
-        obs._data = nullptr;
         return *this;
       };
 
-      ~RamObservation() { delete[] _data; }
-
     private:
-      dtype *_data;
+      Buffer _data;
       Shape _shape;
       Shape _strides;
       int num_pellets, num_viruses;
@@ -112,7 +110,7 @@ namespace agario {
       /* crates the shape and strides to represent the multi-dimensional array */
       void _make_shapes(const GameState &state) {
         auto length = 1 + 2; // ticks, arena_width, arena_height
-        length += 5 * state.players.size();
+        length += 5 * cell_limit * state.players.size();
         length += 2 * num_pellets;
         length += 2 * num_viruses;
         length += 2 * num_foods; // not state.foods.size()
@@ -121,7 +119,8 @@ namespace agario {
         _strides = {(long) sizeof(dtype)};
       }
 
-      /* stores the player's cell data into the data array */
+      /* stores the player's cell data into the data array, in a block
+       * with room for `cell_limit` cells (unused cells are left zero) */
       int _store_player(const Player &player, int start_index) {
         int cell_count = std::min<int>(cell_limit, player.cells.size());
         for (int i = 0; i < cell_count; i++) {
@@ -134,22 +133,21 @@ namespace agario {
           _data[index + 3] = cell.velocity.dx;
           _data[index + 4] = cell.velocity.dy;
         }
-        return start_index + cell_count;
+        return start_index + 5 * cell_limit;
       }
 
-      /* store the given entities in the data array at layer */
+      /* store the given entities in the data array at layer as two contiguous
+       * columns (structure of arrays): the x coordinates of up to `n` entities,
+       * followed by their y coordinates, so that each column has unit stride */
       template<typename U>
       int _store_entities(const std::vector<U> &entities, int start_index, int n) {
+        dtype *xs = _data.get() + start_index;
+        dtype *ys = xs + n;
 
-        int num_stored = 0;
-        for (auto &entity : entities) {
-          auto index = start_index + 2 * num_stored;
-
-          _data[index + 0] = entity.x;
-          _data[index + 1] = entity.y;
-
-          if (++num_stored == n)
-            break;
+        int num_stored = std::min<int>(n, entities.size());
+        for (int i = 0; i < num_stored; i++) {
+          xs[i] = entities[i].x;
+          ys[i] = entities[i].y;
         }
         return start_index + 2 * n;
       }
@@ -178,16 +176,18 @@ namespace agario {
                                                       this->engine.arena_width(),
                                                       this->engine.arena_height());
 #endif
+        // one observation for each agent, sized for the players now in the game
+        auto &state = this->engine_.game_state();
+        for (int i = 0; i < this->num_agents(); i++) {
+          auto &player = this->engine_.player(this->pids_[i]);
+          observations.emplace_back(player, state, num_pellets, num_viruses);
+        }
       }
 
       /* returns the length of the observation data  */
-      typename Observation::Shape observation_shape() const {
-        auto length = 1 + 2; // ticks, arena_width, arena_height
-        length += 5 * (1 + this->num_bots_);
-        length += 2 * num_pellets;
-        length += 2 * num_viruses;
-        length += 2 * num_foods;
-        return { length };
+      const typename Observation::Shape &observation_shape() const {
+        assert (observations.size() > 0);
+        return observations[0].shape();
       }
 
       /**
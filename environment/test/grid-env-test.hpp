@@ -83,6 +83,27 @@ namespace {
               }
   }
 
+  /* make sure that the channels-last (NHWC) observation shape is correct */
+  TEST(GridEnvTest, ObservationShapeChannelsLast) {
+    GridEnvironment env(4, 4, 1000, false, 0, 0, 0);
+
+    for (int num_frames = 0; num_frames < 4; num_frames++)
+      for (int grid_size = 0; grid_size < 4; grid_size++) {
+        env.configure_observation(num_frames, grid_size, true, true, true, true, true);
+
+        int width, height, channels;
+        std::tie(width, height, channels) = env.observation_shape();
+
+        ASSERT_EQ(width, grid_size) << "observation width didn't match grid_size";
+        ASSERT_EQ(height, grid_size) << "observation height didn't match grid_size";
+        ASSERT_EQ(channels, num_frames * 5) << "wrong number of channels in observation";
+
+        ssize_t width_stride, height_stride, channel_stride;
+        std::tie(width_stride, height_stride, channel_stride) = env.get_observations()[0].strides();
+        ASSERT_EQ(channel_stride, sizeof(dtype)) << "channels are not the fastest varying dimension";
+      }
+  }
+
   /* ===================== Fixture Tests ===================== */
 
   class EnvTest : public testing::Test {
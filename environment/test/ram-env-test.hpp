@@ -5,3 +5,57 @@
 #include <environment/renderable.hpp>
 
 using namespace agario::env;
+
+namespace {
+
+  /* a RAM observation holds the ticks and arena size, then a block of cells for each player,
+   * then for each of the pellets, viruses and foods, a column of their x coordinates
+   * followed by a column of their y coordinates (unused entries are zero) */
+  TEST(RamObservationTest, CaptureRam) {
+    using Observation = RamEnvironment<renderable>::Observation;
+
+    agario::GameState<renderable> state(1000, 1000);
+
+    auto player = std::make_shared<agario::Player<renderable>>(0, "agent");
+    player->add_cell(agario::Location(10, 20), 100);
+    state.players[player->pid()] = player;
+
+    state.pellets.emplace_back(agario::Location(1, 2));
+    state.pellets.emplace_back(agario::Location(3, 4));
+    state.viruses.emplace_back(agario::Location(5, 6));
+    state.foods.emplace_back(agario::Location(7, 8), agario::Velocity());
+
+    int num_pellets = 3, num_viruses = 2, num_foods = DEFAULT_NUM_FOODS;
+    Observation observation(*player, state, num_pellets, num_viruses);
+    observation.capture_ram(*player, state);
+    const Observation::dtype *data = observation.data();
+
+    int pellets = 3 + 5 * PLAYER_CELL_LIMIT;
+    int viruses = pellets + 2 * num_pellets;
+    int foods = viruses + 2 * num_viruses;
+    ASSERT_EQ(observation.length(), foods + 2 * num_foods) << "wrong observation length";
+
+    EXPECT_EQ(data[1], 1000);
+    EXPECT_EQ(data[2], 1000);
+
+    EXPECT_EQ(data[3], player->cells[0].mass());
+    EXPECT_EQ(data[4], 10);
+    EXPECT_EQ(data[5], 20);
+    EXPECT_EQ(data[8], 0) << "player's unused cells are not zero";
+
+    // x column, then y column
+    EXPECT_EQ(data[pellets + 0], 1);
+    EXPECT_EQ(data[pellets + 1], 3);
+    EXPECT_EQ(data[pellets + 2], 0);
+    EXPECT_EQ(data[pellets + num_pellets + 0], 2);
+    EXPECT_EQ(data[pellets + num_pellets + 1], 4);
+    EXPECT_EQ(data[pellets + num_pellets + 2], 0);
+
+    EXPECT_EQ(data[viruses], 5);
+    EXPECT_EQ(data[viruses + num_viruses], 6);
+
+    EXPECT_EQ(data[foods], 7);
+    EXPECT_EQ(data[foods + num_foods], 8);
+  }
+
+}
@@ -17,6 +17,8 @@ kinds of observation types:
 
 3. ram      - raw positions and velocities of every entity in a fixed-size vector
               I haven't tried this one, but I'm guessing that this is harder than "grid".
+              Pellets, viruses and foods are each stored as a column of x coordinates
+              followed by a column of y coordinates (rather than interleaved x, y pairs).
 
 
 This gym supports multiple agents in the same game. By default, there will
@@ -58,11 +60,92 @@ will be set True automatically.
 import gym
 from gym import error, spaces, utils
 import numpy as np
+import functools
+import warnings
 from collections import namedtuple
 
 import agarle
 
 
+def _from_legacy_action(action):
+    """ converts an action of the deprecated form (target, a),
+    where `target` is (x, y), to an array (x, y, a)
+    """
+    if isinstance(action, tuple) and len(action) == 2:
+        warnings.warn("actions of the form (target, a) are deprecated, "
+                      "use an array (x, y, a) instead", DeprecationWarning)
+        target, a = action
+        return np.array([target[0], target[1], a], dtype=np.float32)
+    return action
+
+
+# positional arguments of the underlying environments, preceded by `multi_agent`
+EnvArgs = namedtuple('EnvArgs', ['multi_agent', 'num_agents', 'ticks_per_step', 'arena_size',
+                                 'pellet_regen', 'num_pellets', 'num_viruses', 'num_bots'])
+
+# configuration keys which override the difficulty's default environment arguments
+_env_arg_overrides = ("multi_agent", "num_agents", "ticks_per_step", "arena_size",
+                      "num_pellets", "num_viruses", "num_bot", "pellet_regen")
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_env_args(difficulty, overrides):
+    """ resolves the arguments of the underlying environment for a difficulty level.
+    Memoized, since vectorized environments construct many identical environments.
+    :param difficulty: one of "normal", "empty" or "trivial"
+    :param overrides: frozenset of (name, type, value) triples overriding the difficulty's defaults
+    :return: EnvArgs
+    """
+    if difficulty not in ["normal", "empty", "trivial"]:
+        raise ValueError(difficulty)
+
+    multi_agent = False
+    num_agents = 1
+
+    # default values for the "normal"
+    ticks_per_step = 4
+    arena_size = 1000
+    num_pellets = 1000
+    num_viruses = 25
+    num_bots = 25
+    pellet_regen = True
+
+    if difficulty == "normal":
+        pass  # default
+
+    elif difficulty == "empty":
+        # same as "normal" but no enemies
+        num_bots = 0
+
+    elif difficulty == "trivial":
+        arena_size = 50  # tiny arena
+        num_pellets = 200  # plenty of food
+        num_viruses = 0  # no viruses
+        num_bots = 0  # no enemies
+
+    # now, override any of the defaults with those from the arguments
+    # this allows you to specify a difficulty, but also to override
+    # values so you can have, say, "normal" but with zero viruses, or w/e u want
+    overrides = {name: value for name, _, value in overrides}
+    multi_agent     = overrides.get("multi_agent", multi_agent)
+    num_agents      = overrides.get("num_agents", num_agents)
+    ticks_per_step  = overrides.get("ticks_per_step", ticks_per_step)
+    arena_size      = overrides.get("arena_size", arena_size)
+    num_pellets     = overrides.get("num_pellets", num_pellets)
+    num_viruses     = overrides.get("num_viruses", num_viruses)
+    num_bots        = overrides.get("num_bot", num_bots)
+    pellet_regen    = overrides.get("pellet_regen", pellet_regen)
+
+    multi_agent = multi_agent or num_agents > 1
+
+    # todo: more assertions
+    if type(ticks_per_step) is not int or ticks_per_step <= 0:
+        raise ValueError(f"ticks_per_step must be a positive integer")
+
+    return EnvArgs(multi_agent, num_agents, ticks_per_step, arena_size,
+                   pellet_regen, num_pellets, num_viruses, num_bots)
+
+
 class AgarioEnv(gym.Env):
     metadata = {'render.modes': ['human']}
 
@@ -76,58 +159,73 @@ class AgarioEnv(gym.Env):
         self.steps = None
         self.obs_type = obs_type
 
-        target_space = spaces.Box(low=-np.inf, high=np.inf, shape=(2,))
-        self.action_space = spaces.Tuple((target_space, spaces.Discrete(3)))
+        # observations of the grid and ram environments are views of the underlying
+        # environment's own buffers (no copying), which are overwritten on every step,
+        # so each observation is only valid until the next step.
+        self._obs_buf = None
+        if obs_type in ("grid", "ram"):
+            self._observations = self._env.get_state()
+
+        # the observation type is fixed, so choose the methods specialized
+        # for it once here rather than branching on it at every step
+        self._advance = {
+            "grid": self._advance_fused,
+            "ram": self._advance_fused,
+            "screen": self._advance_separately
+        }[obs_type]
+        self._make_observations = {
+            "grid": self._observe_views,
+            "ram": self._observe_views,
+            "screen": self._observe_state
+        }[obs_type]
+
+        # actions are (x, y, a) where `a` is truncated to an integer game-action
+        self.action_space = spaces.Box(low=np.array([-np.inf, -np.inf, 0], dtype=np.float32),
+                                       high=np.array([np.inf, np.inf, 2], dtype=np.float32),
+                                       dtype=np.float32)
 
         self._seed = None
 
+        # render() only renders every `render_every` steps, or never if it's 0
+        self._render_every = kwargs.get("render_every", 1)
+        if type(self._render_every) is not int or self._render_every < 0:
+            raise ValueError(f"render_every must be a non-negative integer")
+
+        # the same info dictionary is returned from every step, updated in place
+        self._info = {'steps': 0}
+
+        # step() is shadowed until the first reset() so that
+        # step() itself needn't check whether reset() was called
+        self.step = self._step_before_reset
+
     def step(self, actions):
         """ take an action in the environment, advancing the environment
         along until the next time step
-        :param actions: either a single tuple, or list of tuples of tuples
-            of the form (x, y, a) where `x`, `y` are in [-1, 1] and `a` is
-            in {0, 1, 2} corresponding to nothing, split, feed, respectively.
+        :param actions: either a single action, or list of actions (or a (num_agents, 3)
+            array) if multi-agent. Each action is an array (x, y, a) where `x`, `y` are
+            in [-1, 1] and `a` is in {0, 1, 2} corresponding to nothing, split, feed,
+            respectively. For backwards compatibility, actions may also be tuples (target, a).
         :return: tuple of - observation, reward, episode_over
-            observation (object) : the next state of the world.
+            observation (object) : the next state of the world. For "grid" and "ram"
+                observations this array is re-used and overwritten by the next call to `step()` or
+                `reset()`, so copy it if it needs to be kept around.
             reward (float) : reward gained during the time step
             episode_over (bool) : whether the game is over or not
-            info (dict) : diagnostic information (currently empty)
+            info (dict) : diagnostic information (number of steps). This same dictionary
+                is updated in place and returned by every call to `step()`, and is
+                cleared by `reset()`, so any keys added to it (e.g. by wrappers) only
+                last for the episode
         """
-        assert self.steps is not None, "Cannot call step() before calling reset()"
+        # agarle checks that the actions are well-formed, raising ValueError otherwise
+        return self._step(self._format_actions(actions))
 
-        if not self.multi_agent:
-            # if not multi-agent then the action should just be a single tuple
-            actions = [actions]
-
-        if type(actions) is not list:
-            raise ValueError("Action list must be a list of two-element tuples")
-
-        if len(actions) != self.num_agents:
-            raise ValueError(f"Number of actions {len(actions)} does"
-                                 f"not match number of agents {self.num_agents}")
-        
-        # make sure that the actions are well-formed
-        for action in actions:
-            if action not in self.action_space:
-                raise ValueError(f"action {action} not in action space")
-        
-        # gotta format the action for the underlying module.
-        # passing the raw target numpy array is tricky because
-        # of data formatting :(
-        actions = [(tgt[0], tgt[1], a) for tgt, a in actions]
-
-        # set the action for each agent
-        self._env.take_actions(actions)
-
-        # step the environment forwards through time
-        rewards = self._env.step()
+    def _step(self, actions):
+        """ steps the environment, as in `step()`, given actions which have already been
+        formatted. Validation of the actions is left to the underlying environment.
+        :param actions: (num_agents, 3) float32 array with rows of (x, y, a)
+        """
+        observations, rewards, dones = self._advance(actions)
         assert len(rewards) == self.num_agents
-
-        # observe the new state of the environment for each agent
-        observations = self._make_observations()
-
-        # get the "done" status of each agent
-        dones = self._env.dones()
         assert len(dones) == self.num_agents
 
         # unwrap observations, rewards, dones if not mult-agent
@@ -137,37 +235,105 @@ class AgarioEnv(gym.Env):
             dones = dones[0]
 
         self.steps += 1
-        return observations, rewards, dones, {'steps': self.steps}
+        self._info['steps'] = self.steps
+        return observations, rewards, dones, self._info
 
     def reset(self):
         """ resets the environment
         :return: the state of the environment at the beginning
         """
         self.steps = 0
+        self._info.clear()
+        self._info['steps'] = 0
+        self.__dict__.pop("step", None)  # un-shadow step()
         self._env.reset()
         obs = self._make_observations()
         return obs if self.multi_agent else obs[0]
 
+    def _step_before_reset(self, actions):
+        raise error.ResetNeeded("Cannot call step() before calling reset()")
+
     def render(self, mode='human'):
-        self._env.render()
+        # skipped frames never reach the underlying environment (or OpenGL)
+        if self._render_every and (self.steps or 0) % self._render_every == 0:
+            self._env.render()
+
+    def _advance_fused(self, actions):
+        """ sets the action for each agent and steps the environment forwards
+        through time in one call to agarle, which also updates the observations
+        :return: tuple of the observations, rewards and dones of each agent
+        """
+        rewards, dones = self._env.step_full(actions, self._obs_buf)
+        return self._observations, rewards, dones
+
+    def _advance_separately(self, actions):
+        """ sets the action for each agent and steps the environment forwards
+        through time, for environments which have no `step_full`
+        :return: tuple of the observations, rewards and dones of each agent
+        """
+        # set the action for each agent
+        self._env.take_actions(actions)
+
+        # step the environment forwards through time
+        rewards = self._env.step()
+
+        # observe the new state of the environment for each agent
+        observations = self._make_observations()
+
+        # get the "done" status of each agent
+        dones = self._env.dones()
+        return observations, rewards, dones
+
+    def _observe_views(self):
+        """ observations which are views of the underlying environment's buffers,
+        and so are always up to date (grid observations are already NHWC)
+        """
+        return self._observations
 
-    def _make_observations(self):
+    def _observe_into_buffer(self):
+        """ copies the observations into the buffer set by `_use_observation_buffer` """
+        self._env.get_state_into(self._obs_buf)
+        return self._observations
+
+    def _observe_state(self):
         """ creates an observation object from the underlying environment
         representing the current state of the game
         :return: An observation object
         """
         states = self._env.get_state()
         assert len(states) == self.num_agents
+        return states
 
-        if self.obs_type in ("grid", ):
-            # convert NCHW to NHWC
-            observations = [np.transpose(state, [1, 2, 0]) for state in states]
+    def _format_actions(self, actions):
+        """ formats the actions passed to `step()` for the underlying environment
+        :param actions: single action, or list of actions if multi-agent
+        :return: (num_agents, 3) float32 array with rows of (x, y, a)
+        """
+        if not isinstance(actions, np.ndarray):
+            if not self.multi_agent:
+                actions = [actions]
 
-        else:
-            observations = states
+            if type(actions) is not list:
+                raise ValueError("Action list must be a list of actions")
 
-        assert len(observations) == self.num_agents
-        return observations
+            actions = [_from_legacy_action(action) for action in actions]
+
+        actions = np.asarray(actions, dtype=np.float32)
+        if actions.ndim == 1:
+            actions = actions[np.newaxis]
+        return actions
+
+    def _use_observation_buffer(self, buffer):
+        """ sets an array into which observations are copied by `step()` and `reset()`,
+        instead of returning views of the underlying environment's buffers
+        :param buffer: C-contiguous array of shape (num_agents, *observation_space.shape)
+            and of the observation space's data type. May be a view into a larger array.
+        """
+        assert buffer.shape == (self.num_agents, ) + self.observation_space.shape
+        assert buffer.dtype == self.observation_space.dtype
+        self._obs_buf = buffer
+        self._observations = list(buffer)
+        self._make_observations = self._observe_into_buffer
 
     def _make_environment(self, obs_type, kwargs):
         """ Instantiates and configures the underlying Agar.io environment (C++ implementation)
@@ -188,26 +354,37 @@ class AgarioEnv(gym.Env):
             observe_others = kwargs.get("observe_others",   True)
             observe_viruses = kwargs.get("observe_viruses", True)
             observe_pellets = kwargs.get("observe_pellets", True)
+            dtype = np.dtype(kwargs.get("grid_dtype", np.int16))
 
-            env = agarle.GridEnvironment(*args)
+            grid_environments = {
+                np.dtype(np.int16): agarle.GridEnvironment,
+                np.dtype(np.int32): agarle.GridEnvironmentInt32,
+                np.dtype(np.uint8): agarle.GridEnvironmentUInt8
+            }
+            if dtype not in grid_environments:
+                raise ValueError(f"unsupported grid_dtype: {dtype}")
+
+            env = grid_environments[dtype](*args)
             env.configure_observation({
                 "num_frames": num_frames,
                 "grid_size": grid_size,
                 "observe_cells": observe_cells,
                 "observe_others": observe_others,
                 "observe_viruses": observe_viruses,
-                "observe_pellets": observe_pellets
+                "observe_pellets": observe_pellets,
+                "layout": "NHWC"  # channels-last, so that no transpose is needed
             })
 
-            channels, width, height = env.observation_shape()
-            shape = (width, height, channels)
-            dtype = np.int32
-            observation_space = spaces.Box(-1, np.iinfo(dtype).max, shape, dtype=dtype)
+            shape = tuple(env.observation_shape())
+
+            # unsigned grids mark out-of-bounds with their maximum value rather than -1
+            low = -1 if np.issubdtype(dtype, np.signedinteger) else 0
+            observation_space = spaces.Box(low, np.iinfo(dtype).max, shape, dtype=dtype)
 
         elif obs_type == "ram":
             env = agarle.RamEnvironment(*args)
             shape = env.observation_shape()
-            observation_space = spaces.Box(-np.inf, np.inf, shape)
+            observation_space = spaces.Box(-np.inf, np.inf, shape, dtype=np.float32)
 
         elif obs_type == "screen":
             if not agarle.has_screen_env:
@@ -238,55 +415,14 @@ class AgarioEnv(gym.Env):
         :param kwargs: arguments from the instantiation of t
         :return: list of arguments to the underlying environment
         """
-        difficulty = kwargs.get("difficulty", "normal")
-        if difficulty not in ["normal", "empty", "trivial"]:
-            raise ValueError(difficulty)
-
-        multi_agent = False
-        num_agents = 1
-
-        # default values for the "normal"
-        ticks_per_step = 4
-        arena_size = 1000
-        num_pellets = 1000
-        num_viruses = 25
-        num_bots = 25
-        pellet_regen = True
-
-        if difficulty == "normal":
-            pass  # default
-
-        elif difficulty == "empty":
-            # same as "normal" but no enemies
-            num_bots = 0
-
-        elif difficulty == "trivial":
-            arena_size = 50  # tiny arena
-            num_pellets = 200  # plenty of food
-            num_viruses = 0  # no viruses
-            num_bots = 0  # no enemies
-
-        # now, override any of the defaults with those from the arguments
-        # this allows you to specify a difficulty, but also to override
-        # values so you can have, say, "normal" but with zero viruses, or w/e u want
-        self.multi_agent     = kwargs.get("multi_agent", multi_agent)
-        self.num_agents      = kwargs.get("num_agents", num_agents)
-        self.ticks_per_step  = kwargs.get("ticks_per_step", ticks_per_step)
-        self.arena_size      = kwargs.get("arena_size", arena_size)
-        self.num_pellets     = kwargs.get("num_pellets", num_pellets)
-        self.num_viruses     = kwargs.get("num_viruses", num_viruses)
-        self.num_bots        = kwargs.get("num_bot", num_bots)
-        self.pellet_regen    = kwargs.get("pellet_regen", pellet_regen)
-
-        self.multi_agent = self.multi_agent or self.num_agents > 1
-
-        # todo: more assertions
-        if type(self.ticks_per_step) is not int or self.ticks_per_step <= 0:
-            raise ValueError(f"ticks_per_step must be a positive integer")
-
-        return self.num_agents, self.ticks_per_step, self.arena_size, \
-               self.pellet_regen, self.num_pellets, \
-               self.num_viruses, self.num_bots
+        # the type of each value is part of the key since equal values of different
+        # types (e.g. 4 and 4.0) must not share a cache entry and so skip validation
+        overrides = frozenset((name, type(kwargs[name]), kwargs[name])
+                              for name in _env_arg_overrides if name in kwargs)
+        env_args = _resolve_env_args(kwargs.get("difficulty", "normal"), overrides)
+
+        self.__dict__.update(env_args._asdict())
+        return tuple(env_args)[1:]  # all but `multi_agent`
 
     def seed(self, seed=None):
         # sets the random seed for reproducibility
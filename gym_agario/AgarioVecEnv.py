@@ -0,0 +1,101 @@
+"""
+File: AgarioVecEnv
+Date: 2026-10-15
+
+This file runs several independent single-agent Agar.io environments
+side by side, stepping them in parallel threads. The underlying C++
+environments release the GIL while the game is being stepped, so the
+environments are simulated on separate cores at the same time.
+
+    env = AgarioVecEnv(8, obs_type="grid", **config)
+    observations = env.reset()  # shape: (8, *env.observation_space.shape)
+    observations, rewards, dones, infos = env.step(actions)
+
+Observations of every environment are written directly into a single
+array which is re-used between steps, so copy it if it needs to be kept.
+Note that the environments share the C random number generator, so seeding
+them does not make rollouts reproducible.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from gym import error
+
+from gym_agario.AgarioEnv import AgarioEnv
+
+
+class AgarioVecEnv:
+
+    def __init__(self, num_envs, obs_type='grid', **kwargs):
+        if num_envs <= 0:
+            raise ValueError(f"num_envs must be a positive integer")
+
+        if obs_type not in ("ram", "grid"):
+            raise ValueError(obs_type)
+
+        self.num_envs = num_envs
+        self.envs = [AgarioEnv(obs_type=obs_type, **kwargs) for _ in range(num_envs)]
+
+        if self.envs[0].multi_agent:
+            raise ValueError("AgarioVecEnv only supports single-agent environments")
+
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+
+        # each environment writes its observations straight into its own slice
+        # of this buffer, so the batch of observations needn't be stacked
+        self._obs_buf = np.empty((num_envs, ) + self.observation_space.shape,
+                                 dtype=self.observation_space.dtype)
+        for i, env in enumerate(self.envs):
+            env._use_observation_buffer(self._obs_buf[i:i + 1])
+
+        self._pool = ThreadPoolExecutor(max_workers=num_envs)
+
+        # step() is shadowed until the first reset(), as in AgarioEnv
+        self.step = self._step_before_reset
+
+    def step(self, actions):
+        """ steps every environment forward by one time step, in parallel
+        :param actions: (num_envs, 3) array (or sequence) of actions (x, y, a),
+            one for each environment
+        :return: tuple of
+            observations (np.ndarray) : the next state of each environment
+            rewards (np.ndarray) : reward gained by each environment during the time step
+            dones (np.ndarray) : whether each environment's episode is over
+            infos (list) : diagnostic information of each environment
+        """
+        # format and validate the actions of every environment at once,
+        # rather than once per environment in each AgarioEnv.step
+        actions = np.asarray(actions, dtype=np.float32)
+        if actions.shape != (self.num_envs, 3):
+            raise ValueError(f"actions must be of shape ({self.num_envs}, 3), got {actions.shape}")
+
+        low, high = self.action_space.low, self.action_space.high
+        if not np.all((low <= actions) & (actions <= high)):
+            raise ValueError(f"actions {actions} not in action space")
+
+        # each environment has a single agent
+        actions = actions[:, np.newaxis]
+        results = list(self._pool.map(lambda env, action: env._step(action), self.envs, actions))
+
+        rewards = np.array([reward for _, reward, _, _ in results], dtype=np.float32)
+        dones = np.array([done for _, _, done, _ in results], dtype=bool)
+        infos = [info for *_, info in results]
+        return self._obs_buf, rewards, dones, infos
+
+    def reset(self):
+        """ resets every environment
+        :return: the state of each environment at the beginning
+        """
+        self.__dict__.pop("step", None)  # un-shadow step()
+        list(self._pool.map(lambda env: env.reset(), self.envs))
+        return self._obs_buf
+
+    def _step_before_reset(self, actions):
+        raise error.ResetNeeded("Cannot call step() before calling reset()")
+
+    def close(self):
+        self._pool.shutdown()
+        for env in self.envs:
+            env.close()
@@ -16,6 +16,11 @@ register(id='agario-grid-v0',
          entry_point='gym_agario.AgarioEnv:AgarioEnv',
          kwargs={'obs_type': 'grid'})
 
+# grid observations saturated to uint8, for compact storage in replay buffers
+register(id='agario-grid-u8-v0',
+         entry_point='gym_agario.AgarioEnv:AgarioEnv',
+         kwargs={'obs_type': 'grid', 'grid_dtype': 'uint8'})
+
 
 if agarle.has_screen_env:
     # only register the screen environment if its available
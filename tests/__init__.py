@@ -6,7 +6,7 @@ Author: Jon Deaton (jonpauldeaton@gmail.com)
 
 import numpy as np
 
-null_action = (np.zeros(2), 0)
+null_action = np.zeros(3, dtype=np.float32)
 
 # Default environment configuration for tests.
 default_config = {
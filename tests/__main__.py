@@ -9,6 +9,7 @@ from gym import envs
 import unittest
 
 from tests.grid_env_test import GridGymTest
+from tests.vec_env_test import VecGymTest
 # from tests.ram_env_test import RamGymTest # Ram environment is not ready yet.
 
 # only test the screen environment if its available
@@ -10,11 +10,15 @@ import gym, gym_agario
 import numpy as np
 
 import unittest
+import timeit
 
 from tests import default_config, null_action
 
 env_name = "agario-grid-v0"
 
+# stepping slower than this indicates a performance regression
+min_steps_per_second = 100
+
 
 def set_bit_count(n):
     """ counts and returns the number of bits that are "on"
@@ -29,50 +33,175 @@ def set_bit_count(n):
 
 class GridGymTest(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # constructing an environment is expensive, so tests
+        # which don't depend on a fresh environment share this one
+        cls.env = gym.make(env_name, **default_config)
+
     def test_creation(self):
         """ tests to make sure that you can instantiate
         an environment and that it is the correct type
         """
-        env = gym.make(env_name, **default_config)
-        self.assertIsInstance(env, gym.Env)
+        self.assertIsInstance(self.env, gym.Env)
 
     def test_reset(self):
         """ tests that resetting the environment returns a valid state
         """
-        env = gym.make(env_name, **default_config)
-        
-        state = env.reset()
-        self._assertValidState(env, state)
+        state = self.env.reset()
+        self._assertValidState(self.env, state)
+
+    def test_reset_clears_info(self):
+        """ tests that keys added to the info dictionary (e.g. by wrappers)
+        don't carry over into the next episode
+        """
+        env = self.env
+        env.reset()
+        _, _, _, info = env.step(null_action)
+        info['episode'] = {'r': 0}
+        env.reset()
+        _, _, _, info = env.step(null_action)
+        self.assertEqual(info, {'steps': 1})
+
+    def test_step_before_reset(self):
+        """ tests that stepping the environment before
+        resetting it raises an error
+        """
+        # unwrapped, since gym's OrderEnforcing wrapper would raise before AgarioEnv.step runs
+        env = gym.make(env_name, **default_config).unwrapped
+        with self.assertRaises(gym.error.ResetNeeded):
+            env.step(null_action)
+
+    def test_invalid_ticks_per_step(self):
+        """ tests that a non-integer ticks_per_step is rejected, even after an
+        environment with an equal integer ticks_per_step has been made
+        """
+        gym.make(env_name, **dict(default_config, ticks_per_step=4))
+        with self.assertRaises(ValueError):
+            gym.make(env_name, **dict(default_config, ticks_per_step=4.0))
 
     def test_action_space(self):
         """ tests that valid actions are within the action
         space and invalid actions are not within the action space
         """
-        env = gym.make(env_name, **default_config)
+        env = self.env
 
         for x in range(-10, 10):
             for y in range(-10, 10):
                 for a in (0, 1, 2):
-                    action = (np.array([float(x), float(y)]), a)
+                    action = np.array([x, y, a], dtype=np.float32)
                     self.assertTrue(action in env.action_space, "valid action is not within action space")
 
                 for a in (-1, -2, 3, 4, 5):
-                    action = (np.array([float(x), float(y)]), a)
+                    action = np.array([x, y, a], dtype=np.float32)
                     self.assertFalse(action in env.action_space, "invalid action is within action space")
 
+    def test_legacy_action(self):
+        """ tests that deprecated (target, a) actions are still accepted
+        """
+        env = self.env
+        env.reset()
+        with self.assertWarns(DeprecationWarning):
+            state, *_ = env.step((np.zeros(2), 0))
+        self._assertValidState(env, state)
+
     def test_steps(self):
-        """ test that you can "step" the environment and
-        that the return values of the step are well-formed
+        """ test that you can "step" the environment, that the return values
+        of the step are well-formed, that the state is actually updated between
+        steps (i.e. not a stale buffer) and that stepping isn't too slow
         """
-        env = gym.make(env_name, **default_config)
+        # no bots, since they sometimes eat the agent, whose observation then stops being updated
+        env = gym.make(env_name, **dict(default_config, difficulty="empty"))
         env.reset()
-        for _ in range(1024):
-            state, reward, done, info = env.step(null_action)
+
+        num_steps = 1000
+        sampled_state = None
+
+        # move in a random direction each step so that the view keeps changing
+        # (a fixed direction just pins the agent against a wall of the arena)
+        rng = np.random.RandomState(0)
+        angles = rng.uniform(0, 2 * np.pi, size=num_steps)
+        actions = np.stack([np.cos(angles), np.sin(angles), np.zeros(num_steps)], axis=1).astype(np.float32)
+
+        for i in range(num_steps):
+            state, reward, done, info = env.step(actions[i])
             self.assertIsInstance(reward, float, "reward was not a float")
             self.assertIsInstance(done, bool, "done is not a boolean")
             self.assertIsInstance(info, dict, "info is not a dictionary")
+
+            if i % 100 == 0:
+                if sampled_state is not None:
+                    self.assertTrue(np.any(state != sampled_state), "state was not updated")
+                sampled_state = state.copy()
+
             self._assertValidState(env, state)  # make sure the state is valid
 
+        # timed separately, so that the checks above aren't counted as stepping time
+        start = timeit.default_timer()
+        for i in range(num_steps):
+            env.step(actions[i])
+        elapsed = timeit.default_timer() - start
+
+        self.assertGreater(num_steps / elapsed, min_steps_per_second, "stepping is too slow")
+
+    def test_state_outlives_reconfiguration(self):
+        """ tests that a state returned by the environment remains valid (and
+        unchanged) after the underlying environment's observations are re-configured
+        """
+        env = gym.make(env_name, **default_config)
+        state = env.reset()
+        expected = state.copy()
+
+        # replaces the buffers which `state` views, then re-uses the freed memory (if it was)
+        env.unwrapped._env.configure_observation({"grid_size": 16})
+        arrays = [np.full(state.shape, 7, dtype=state.dtype) for _ in range(8)]
+
+        np.testing.assert_array_equal(state, expected)
+
+    def test_render_every(self):
+        """ tests that render() only renders every `render_every` steps,
+        never renders if it's 0, and that invalid values are rejected
+        """
+        class RenderCounter:
+            """ stands in for the underlying environment, counting renders """
+            def __init__(self, env):
+                self.env = env
+                self.renders = 0
+
+            def render(self):
+                self.renders += 1
+
+            def __getattr__(self, name):
+                return getattr(self.env, name)
+
+        num_steps = 10
+        for render_every, expected_renders in [(1, 10), (3, 3), (0, 0)]:
+            env = gym.make(env_name, **dict(default_config, render_every=render_every))
+            counter = RenderCounter(env.unwrapped._env)
+            env.unwrapped._env = counter
+
+            env.reset()
+            for _ in range(num_steps):
+                env.step(null_action)
+                env.render()
+            self.assertEqual(counter.renders, expected_renders,
+                             f"wrong number of renders with render_every={render_every}")
+
+        for render_every in [-1, 1.5]:
+            with self.assertRaises(ValueError):
+                gym.make(env_name, **dict(default_config, render_every=render_every))
+
+    def test_dtype(self):
+        """ tests that the data type of the observation
+        follows the `grid_dtype` configuration
+        """
+        for dtype in (np.int16, np.int32, np.uint8):
+            env = gym.make(env_name, **default_config, grid_dtype=dtype)
+            self.assertEqual(env.observation_space.dtype, dtype)
+
+            state = env.reset()
+            self.assertEqual(state.dtype, dtype, "incorrect data type: %s" % state.dtype)
+
     def test_shape(self):
         """ tests that the shape of the observation
         is consistent with the env configuration
@@ -128,7 +257,7 @@ class GridGymTest(unittest.TestCase):
         to make sure that it is a plausible state for the given environment.
         """
         self.assertIsInstance(state, np.ndarray, "state is not a numpy array")
-        self.assertEqual(state.dtype, np.int32, "incorrect data type: %s" % state.dtype)
+        self.assertEqual(state.dtype, np.int16, "incorrect data type: %s" % state.dtype)
 
         self._assertCorrectShape(env, state)
 
@@ -138,10 +267,10 @@ class GridGymTest(unittest.TestCase):
         # this one is really important
         self.assertLess(state.min(), state.max())  # not all just one value
 
-        # fill the state array with zeros ensures that the numpy data pointer
-        # points to a valid array. If an invalid pointer was provided, this would
-        # probably cause a segmentation fault shortly after
-        state.fill(0)
+        # the state is a view of the environment's own buffer, which only the environment
+        # may write to. Taking its min and max (above) reads the whole array, so an
+        # invalid data pointer would probably have caused a segmentation fault already
+        self.assertFalse(state.flags.writeable, "state is a writeable view of the environment")
 
     def _assertCorrectShape(self, env, state):
         """ asserts that the shape of `state` is valid given the observation space of `env`
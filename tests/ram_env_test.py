@@ -8,6 +8,7 @@ Author: Jon Deaton (jonpauldeaton@gmail.com)
 
 
 import gym, gym_agario
+from gym_agario.AgarioVecEnv import AgarioVecEnv
 
 import numpy as np
 import unittest
@@ -43,18 +44,19 @@ class RamGymTest(unittest.TestCase):
         for x in range(-10, 10):
             for y in range(-10, 10):
                 for a in (0, 1, 2):
-                    action = (np.array([float(x), float(y)]), a)
+                    action = np.array([x, y, a], dtype=np.float32)
                     self.assertTrue(action in env.action_space, "valid action is not within action space")
 
                 for a in (-1, -2, 3, 4, 5):
-                    action = (np.array([float(x), float(y)]), a)
+                    action = np.array([x, y, a], dtype=np.float32)
                     self.assertFalse(action in env.action_space, "invalid action is within action space")
 
     def test_steps(self):
         """ test that you can "step" the environment and
         that the return values of the step are well-formed
         """
-        env = gym.make(env_name, **default_config)
+        # no bots, since they sometimes eat the agent, whose observation is then all zeros
+        env = gym.make(env_name, **dict(default_config, difficulty="empty"))
         env.reset()
         for _ in range(1024):
             state, reward, done, info = env.step(null_action)
@@ -63,6 +65,23 @@ class RamGymTest(unittest.TestCase):
             self.assertIsInstance(info, dict, "info is not a dictionary")
             self._assertValidState(env, state)  # make sure the state is valid
 
+    def test_steps_into_buffer(self):
+        """ tests that observations copied into a buffer (as AgarioVecEnv does)
+        are the same as those viewed from the environment, and that a buffer
+        of the wrong size is rejected
+        """
+        num_envs = 2
+        env = AgarioVecEnv(num_envs, obs_type="ram", **dict(default_config, difficulty="empty"))
+        states = env.reset()
+        for _ in range(10):
+            for i in range(num_envs):
+                np.testing.assert_array_equal(states[i], env.envs[i]._env.get_state()[0])
+            states, _, _, _ = env.step([null_action] * num_envs)
+
+        with self.assertRaises(ValueError):
+            env.envs[0]._env.get_state_into(np.empty((1, states.shape[1] + 1), dtype=np.float32))
+        env.close()
+
     def test_shape(self):
         """ tests that the shape of the observation
         is consistent with the env configuration
@@ -80,16 +99,18 @@ class RamGymTest(unittest.TestCase):
 
         self._assertCorrectShape(env, state)
 
-        self.assertGreaterEqual(state.min(), -1)
-        self.assertLess(state.max(), 1000)
+        # (unlike grid observations, these are positions, masses and velocities)
+        self.assertTrue(np.all(np.isfinite(state)), "state has non-finite values")
+        self.assertEqual(state[1], env.unwrapped.arena_size, "wrong arena width")
+        self.assertEqual(state[2], env.unwrapped.arena_size, "wrong arena height")
 
         # this one is really important
         self.assertLess(state.min(), state.max())  # not all just one value
 
-        # fill the state array with zeros ensures that the numpy data pointer
-        # points to a valid array. If an invalid pointer was provided, this would
-        # probably cause a segmentation fault shortly after
-        state.fill(0)
+        # the state is a view of the environment's own buffer, which only the environment
+        # may write to. Taking its min and max (above) reads the whole array, so an
+        # invalid data pointer would probably have caused a segmentation fault already
+        self.assertFalse(state.flags.writeable, "state is a writeable view of the environment")
 
     def _assertCorrectShape(self, env, state):
         """ asserts that the shape of `state` is valid given the observation space of `env`
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+"""
+File: vec_env_test
+Date: 10/15/26
+"""
+
+import numpy as np
+import unittest
+
+from gym_agario.AgarioVecEnv import AgarioVecEnv
+from tests import default_config, null_action
+
+# no bots, since they sometimes eat an agent, whose observation then stops being updated.
+# default_config's "num_bots" doesn't undo this, since the environment's argument is "num_bot"
+config = dict(default_config, difficulty="empty")
+
+
+class VecGymTest(unittest.TestCase):
+
+    num_envs = 4
+
+    def test_reset(self):
+        """ tests that resetting returns a batch with a valid state for every environment
+        """
+        env = AgarioVecEnv(self.num_envs, **config)
+        states = env.reset()
+        self._assertValidStates(env, states)
+        env.close()
+
+    def test_steps(self):
+        """ tests that stepping every environment returns well-formed values
+        """
+        env = AgarioVecEnv(self.num_envs, **config)
+        env.reset()
+        for _ in range(100):
+            states, rewards, dones, infos = env.step([null_action] * self.num_envs)
+            self.assertEqual(rewards.shape, (self.num_envs, ), "wrong number of rewards")
+            self.assertEqual(dones.shape, (self.num_envs, ), "wrong number of dones")
+            self.assertEqual(len(infos), self.num_envs, "wrong number of infos")
+            self._assertValidStates(env, states)
+        env.close()
+
+    def test_wrong_number_of_actions(self):
+        """ tests that passing the wrong number of actions raises an error
+        """
+        env = AgarioVecEnv(self.num_envs, **config)
+        env.reset()
+        with self.assertRaises(ValueError):
+            env.step([null_action] * (self.num_envs + 1))
+        env.close()
+
+    def test_invalid_actions(self):
+        """ tests that actions outside of the action space raise an error
+        """
+        env = AgarioVecEnv(self.num_envs, **config)
+        env.reset()
+        actions = np.zeros((self.num_envs, 3), dtype=np.float32)
+        actions[-1, 2] = 3  # not a game-action
+        with self.assertRaises(ValueError):
+            env.step(actions)
+        env.close()
+
+    def _assertValidStates(self, env, states):
+        """ asserts that the batch of states is well-formed
+        """
+        self.assertIsInstance(states, np.ndarray, "states is not a numpy array")
+        self.assertEqual(states.shape, (self.num_envs, ) + env.observation_space.shape)
+        for state in states:
+            self.assertTrue(state in env.observation_space, "state is not in observation space")
+            self.assertLess(state.min(), state.max())  # not all just one value
+
+
+if __name__ == "__main__":
+    unittest.main()